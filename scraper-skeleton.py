@@ -0,0 +1,423 @@
+"""
+End-to-end skeleton for the disclosure pipeline:
+ingestion (EDGAR in production, mock files here) -> preprocessing ->
+Gemini translation/summarization into a structured dict.
+
+Run directly to exercise the whole flow against mock data:
+    python scraper-skeleton.py
+
+Requires GEMINI_API_KEY for the summarization step.
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import shelve
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import httpx
+
+# orjson parses and serializes JSON several times faster than the stdlib
+# module (it matters on large Gemini response bodies); optional, with a
+# stdlib fallback.
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+# pyahocorasick matches every glossary term in one linear scan, independent
+# of glossary size — a real financial glossary runs to hundreds of acronyms,
+# where a regex alternation degrades. Optional; the fused regex remains the
+# fallback.
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# diskcache persists cleaned output across process runs (development and
+# tests re-run the same filings constantly); optional — without it cleaning
+# simply runs every time.
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def json_dumps_pretty(obj) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(obj, indent=4)
+
+
+logger = logging.getLogger(__name__)
+
+MOCK_DATA_DIR = "mock_data"
+
+# LLM response cache: keyed by SHA-256(PROMPT_VERSION | system prompt | text),
+# so re-running a filing is microseconds instead of a paid multi-second call.
+# Bump PROMPT_VERSION whenever the prompt or schema changes to invalidate
+# stale entries.
+GEMINI_CACHE_PATH = "gemini_summary_cache"
+PROMPT_VERSION = "v1"
+CACHE_TTL_SECONDS = 7 * 86400
+
+# Preprocessing cache: content-addressed by SHA-1 of the raw text, one layer
+# before the LLM cache above. Opened lazily so importing the module creates
+# no files.
+PREPROC_CACHE_PATH = ".preproc_cache"
+_preproc_cache = None
+
+
+def _get_preproc_cache():
+    global _preproc_cache
+    if diskcache is not None and _preproc_cache is None:
+        _preproc_cache = diskcache.Cache(PREPROC_CACHE_PATH)
+    return _preproc_cache
+
+MOCK_CONTENT = """<html><body>
+<h1>Form 8-K: Current Report</h1>
+<p>ABC Corp. announced EBITDA of $1.2 billion for the quarter, with EPS of
+$0.87, exceeding guidance. The company disclosed in its most recent 10-K that
+litigation risk remains elevated. Management reaffirmed its outlook of
+&euro;500 million in European revenue.</p>
+<p>The board approved a new note offering; details will follow in a
+subsequent 8-K filing.</p>
+</body></html>"""
+
+
+# Module-level so the cache is shared across IngestionManager instances
+# (tests and notebooks construct the manager repeatedly). mmap maps the file
+# read-only without a user-space buffer copy; the LRU keeps the 64 most
+# recently fetched documents so repeat fetches skip disk entirely.
+@functools.lru_cache(maxsize=64)
+def _read_document(path: str) -> str:
+    with open(path, "rb") as f:
+        # mmap refuses zero-length files; an empty document is still valid.
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[:].decode("utf-8", errors="replace")
+
+
+class IngestionManager:
+    """Fetches filing documents. Production EDGAR fetches go through a pooled
+    session; for now fetch_document_text reads the local mock files."""
+
+    def __init__(self, user_agent: str = "nlp-financial-disclosures research"):
+        # EDGAR speaks HTTP/2: one connection multiplexes concurrent fetches
+        # instead of opening a socket (and TLS handshake) per request.
+        self.session = httpx.Client(
+            http2=True,
+            headers={"User-Agent": user_agent},
+            timeout=30.0,
+        )
+
+    def fetch_document_text(self, ticker: str, filing_type: str) -> str:
+        path = os.path.join(MOCK_DATA_DIR, f"{ticker}_{filing_type}.txt")
+        return _read_document(path)
+
+
+class Preprocessor:
+    """Cleans filing text before it goes to the LLM: strips tags, expands
+    financial jargon, normalizes currency symbols and whitespace."""
+
+    # acronym -> plain-English expansion (a real glossary is much larger)
+    jargon_map = {
+        "EBITDA": "Earnings Before Interest, Taxes, Depreciation and Amortization",
+        "EPS": "Earnings Per Share",
+        "10-K": "Annual Report",
+        "8-K": "Current Report",
+    }
+
+    def __init__(self):
+        # All patterns are compiled once here. The jargon map is fused into a
+        # single alternation with a dict-lookup callback, so clean_text makes
+        # one pass over the (potentially multi-megabyte) text instead of one
+        # full re.sub scan per term.
+        self._replacements = {k.lower(): v for k, v in self.jargon_map.items()}
+        self._jargon_re = re.compile(
+            r"\b(" + "|".join(map(re.escape, self.jargon_map)) + r")\b",
+            re.IGNORECASE,
+        )
+        if ahocorasick is not None:
+            self._ac = ahocorasick.Automaton()
+            for term, repl in self._replacements.items():
+                self._ac.add_word(term, (len(term), repl))
+            self._ac.make_automaton()
+        else:
+            self._ac = None
+        self._tag_re = re.compile(r"<[^>]+>")
+        self._ws_re = re.compile(r"\s+")
+        self._currency_map = {"$": " USD ", "€": " EUR "}
+        self._currency_re = re.compile(r"[$€]")
+
+    def _expand_jargon_ac(self, text: str) -> str:
+        """Expand glossary terms with a single Aho-Corasick scan.
+
+        O(len(text) + matches) regardless of how many terms the glossary
+        holds. Matches are taken greedily left-to-right, non-overlapping,
+        and must fall on word boundaries to mirror the regex's \\b anchors;
+        the output is assembled with one join instead of repeated slicing.
+        """
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Lowercasing can change length (e.g. Turkish 'İ' expands to two
+            # code points), which would shift every match index against the
+            # original text; take the exact regex path for such inputs.
+            return self._jargon_re.sub(
+                lambda m: self._replacements[m.group(0).lower()], text
+            )
+        n = len(lowered)
+        parts = []
+        prev_end = 0
+        for end_idx, (length, repl) in self._ac.iter(lowered):
+            start = end_idx - length + 1
+            if start < prev_end:
+                continue
+            before = lowered[start - 1] if start else " "
+            after = lowered[end_idx + 1] if end_idx + 1 < n else " "
+            if before.isalnum() or before == "_" or after.isalnum() or after == "_":
+                continue
+            parts.append(text[prev_end:start])
+            parts.append(repl)
+            prev_end = end_idx + 1
+        parts.append(text[prev_end:])
+        return "".join(parts)
+
+    def clean_text(self, text: str) -> str:
+        """Clean one filing, memoized on SHA-1 of the raw text when the
+        persistent cache is available: repeat runs of the same filing read
+        the cleaned output back in microseconds instead of re-running the
+        regex stages."""
+        cache = _get_preproc_cache()
+        if cache is None:
+            return self._clean_impl(text)
+        key = hashlib.sha1(text.encode("utf-8")).digest()
+        cleaned = cache.get(key)
+        if cleaned is None:
+            cleaned = self._clean_impl(text)
+            cache.set(key, cleaned)
+        return cleaned
+
+    def _clean_impl(self, text: str) -> str:
+        text = self._tag_re.sub(" ", text)
+        if self._ac is not None:
+            text = self._expand_jargon_ac(text)
+        else:
+            text = self._jargon_re.sub(lambda m: self._replacements[m.group(0).lower()], text)
+        text = self._currency_re.sub(lambda m: self._currency_map[m.group(0)], text)
+        text = self._ws_re.sub(" ", text)
+        return text.strip()
+
+
+class GeminiInterface:
+    """Sends cleaned filing text to Gemini and returns a structured summary."""
+
+    SYSTEM_PROMPT = (
+        "You are a financial analyst. Translate the following disclosure into "
+        "plain English for a retail investor. Respond with a JSON object with "
+        'keys "plain_summary" (string), "material_risks" (list of strings) '
+        'and "financial_highlights" (list of strings).'
+    )
+
+    MAX_RETRIES = 5
+
+    def __init__(self, api_key: Optional[str] = None, model: str = "gemini-2.5-flash"):
+        self.api_key = api_key or os.environ.get("GEMINI_API_KEY", "")
+        self.api_url = (
+            "https://generativelanguage.googleapis.com/v1beta/models/"
+            f"{model}:generateContent?key={self.api_key}"
+        )
+        self.stream_api_url = (
+            "https://generativelanguage.googleapis.com/v1beta/models/"
+            f"{model}:streamGenerateContent?alt=sse&key={self.api_key}"
+        )
+        self._cache = shelve.open(GEMINI_CACHE_PATH)
+        # HTTP/2 client: sequential and concurrent calls share one warm
+        # connection instead of a TCP+TLS handshake each. The transport
+        # retries connection failures; 429/5xx backoff lives in
+        # _call_gemini_api because httpx does not retry on status codes.
+        self.session = httpx.Client(
+            http2=True,
+            timeout=60.0,
+            transport=httpx.HTTPTransport(retries=3),
+        )
+
+    def _cache_key(self, text: str) -> str:
+        raw = f"{PROMPT_VERSION}|{self.SYSTEM_PROMPT}|{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key: str):
+        entry = self._cache.get(key)
+        if entry is not None and entry["expires"] > time.time():
+            return entry["value"]
+        return None
+
+    def _cache_put(self, key: str, value: dict):
+        self._cache[key] = {"value": value, "expires": time.time() + CACHE_TTL_SECONDS}
+
+    def _build_payload(self, text: str) -> dict:
+        return {
+            "contents": [{"parts": [{"text": f"{self.SYSTEM_PROMPT}\n\n{text}"}]}],
+            "generationConfig": {"response_mime_type": "application/json"},
+        }
+
+    def _call_gemini_api(self, payload: dict) -> dict:
+        """POST to the SSE streaming endpoint and return the parsed summary.
+
+        The structured output arrives progressively as `data:` events, so
+        parsing overlaps with the network transfer: each event's text part
+        is appended to a buffer that raw_decode retries, and the connection
+        is dropped as soon as the top-level JSON object closes instead of
+        waiting for the full response body. 429/5xx responses are retried
+        with exponential backoff.
+        """
+        decoder = json.JSONDecoder()
+        for attempt in range(1, self.MAX_RETRIES + 1):
+            buf = ""
+            with self.session.stream("POST", self.stream_api_url, json=payload) as response:
+                if (
+                    response.status_code == 429 or response.status_code >= 500
+                ) and attempt < self.MAX_RETRIES:
+                    time.sleep(0.5 * 2 ** attempt)
+                    continue
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if not line or not line.startswith("data:"):
+                        continue
+                    event = line[5:].strip()
+                    if event == "[DONE]":
+                        break
+                    chunk = json_loads(event)
+                    for cand in chunk.get("candidates", []):
+                        for part in cand.get("content", {}).get("parts", []):
+                            buf += part.get("text", "")
+                    try:
+                        result, _ = decoder.raw_decode(buf.lstrip())
+                    except ValueError:
+                        continue
+                    return result
+            return json_loads(buf)
+        raise RuntimeError("unreachable")
+
+    def translate_and_summarize(self, text: str) -> dict:
+        key = self._cache_key(text)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        result = self._call_gemini_api(self._build_payload(text))
+        self._cache_put(key, result)
+        return result
+
+    async def _call_gemini_api_async(self, client: "httpx.AsyncClient", payload: dict) -> dict:
+        response = await client.post(self.api_url, json=payload)
+        response.raise_for_status()
+        return json_loads(response.content)
+
+    async def translate_and_summarize_batch_async(self, texts, concurrency: int = 8):
+        """Summarize many filings concurrently over one HTTP/2 connection.
+
+        Each call is seconds of network latency, so batch wall time is
+        roughly len(texts) / concurrency sequential calls; HTTP/2
+        multiplexes the in-flight requests over one connection. Failures
+        come back in-place as exception objects (return_exceptions=True)."""
+        sem = asyncio.Semaphore(concurrency)
+
+        async def one(client, text):
+            key = self._cache_key(text)
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+            async with sem:
+                data = await self._call_gemini_api_async(client, self._build_payload(text))
+                json_string = data["candidates"][0]["content"]["parts"][0]["text"]
+                result = json_loads(json_string)
+                self._cache_put(key, result)
+                return result
+
+        limits = httpx.Limits(max_keepalive_connections=20)
+        async with httpx.AsyncClient(http2=True, limits=limits, timeout=60.0) as client:
+            return await asyncio.gather(*(one(client, t) for t in texts), return_exceptions=True)
+
+    def translate_and_summarize_batch(self, texts, concurrency: int = 8):
+        """Sync wrapper around the async batch path."""
+        return asyncio.run(self.translate_and_summarize_batch_async(texts, concurrency))
+
+
+# One Preprocessor per worker process, built lazily on first use so the
+# compiled patterns are reused across every document that worker handles.
+_worker_preprocessor = None
+
+
+def process_one(path: str) -> str:
+    """Read and clean one filing. Top-level so it pickles for worker processes."""
+    global _worker_preprocessor
+    if _worker_preprocessor is None:
+        _worker_preprocessor = Preprocessor()
+    return _worker_preprocessor.clean_text(_read_document(path))
+
+
+def run_pipeline_batch(paths, concurrency: int = 8):
+    """Clean many filings across CPU cores, then summarize them concurrently.
+
+    Cleaning is regex-heavy CPU work the GIL serializes, so it fans out to
+    a process pool and scales with cores. The Gemini stage is network-bound
+    and stays in this process on the asyncio batch path, where one HTTP/2
+    connection covers all in-flight calls.
+    """
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        cleaned = list(executor.map(process_one, paths, chunksize=4))
+
+    gemini = GeminiInterface()
+    return gemini.translate_and_summarize_batch(cleaned, concurrency=concurrency)
+
+
+def create_mock_data():
+    """Write the demo filing unless it is already on disk.
+
+    Keeping this out of module scope means importers (notebooks, tests)
+    pay no filesystem syscalls, and warm runs skip the write entirely.
+    """
+    path = os.path.join(MOCK_DATA_DIR, "ABC_8-K.txt")
+    if os.path.exists(path):
+        return
+    os.makedirs(MOCK_DATA_DIR, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(MOCK_CONTENT)
+
+
+def run_pipeline(ticker: str = "ABC", filing_type: str = "8-K") -> dict:
+    ingestion = IngestionManager()
+    preprocessor = Preprocessor()
+    gemini = GeminiInterface()
+
+    raw_text = ingestion.fetch_document_text(ticker, filing_type)
+    cleaned_text = preprocessor.clean_text(raw_text)
+
+    # %.300s truncates inside the formatter, and logging formats lazily, so
+    # non-debug runs build no snippet string at all (cleaned_text can be MBs).
+    logger.debug(
+        "Cleaned text snippet:\n%.300s%s",
+        cleaned_text,
+        "..." if len(cleaned_text) > 300 else "",
+    )
+
+    structured_output = gemini.translate_and_summarize(cleaned_text)
+    print(json_dumps_pretty(structured_output))
+    return structured_output
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"))
+    create_mock_data()
+    run_pipeline()
@@ -0,0 +1,210 @@
+"""
+Quick corpus statistics for a single filing: overall word counts, top
+words, and rough topic-keyword coverage. Standalone, no LLM calls.
+
+Usage:
+    python topic_analysis.py [path/to/filing.txt]
+"""
+
+import heapq
+import operator
+import sys
+from collections import Counter
+
+# Optional fast path: a Numba kernel that tokenizes and counts directly on the
+# byte buffer (lowercase via OR 0x20, FNV-1a hashing into an open-addressing
+# table). 20-100x faster than the Python loop on large filings, at the cost of
+# holding the file in memory once. Falls back to the streaming loop below.
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    njit = None  # type: ignore[assignment]
+
+
+FILE_PATH = "mock_data/ABC_8-K.txt"
+
+# Interned frozenset: membership tests hit the identity fast path for
+# interned probe strings before falling back to char-by-char comparison,
+# and frozenset hashes are cached.
+stopwords = frozenset(sys.intern(w) for w in {
+    "the", "and", "for", "that", "with", "this", "from", "are", "was",
+    "were", "has", "have", "had", "will", "shall", "may", "its", "our",
+    "their", "such", "any", "all", "not", "but", "been", "which", "who",
+    "would", "could", "should", "than", "then", "there", "these", "those",
+    "into", "upon", "under", "over", "per", "each", "other", "more", "most",
+    "company", "inc", "corp", "pursuant", "herein", "thereof",
+})
+
+topic_keywords = {
+    "earnings": {"revenue", "income", "profit", "earnings", "margin", "guidance"},
+    "risk": {"risk", "risks", "litigation", "uncertainty", "liability", "adverse"},
+    "governance": {"board", "director", "officer", "governance", "committee"},
+    "debt": {"debt", "notes", "interest", "maturity", "offering", "coupon"},
+}
+
+
+# Reverse keyword index built once at import: topic coverage then needs a
+# single pass over the counted vocabulary instead of one scan per topic.
+_KEYWORD_TO_TOPIC = {w: topic for topic, kws in topic_keywords.items() for w in kws}
+
+# Bytes-domain cleanup: lowercase A-Z via a 256-byte translate table and
+# delete every other non-letter, non-whitespace byte in the same C-level
+# pass. Working on raw bytes skips per-line UTF-8 decode and validation
+# entirely; tokens that survive are pure a-z and decode trivially at the end.
+_LOWER_TABLE = bytes.maketrans(bytes(range(65, 91)), bytes(range(97, 123)))
+_DELETE_BYTES = bytes(
+    i for i in range(256)
+    if not (97 <= i <= 122 or 65 <= i <= 90) and i not in b" \t\n\r\x0b\x0c"
+)
+
+_STOPWORD_BYTES = frozenset(w.encode("ascii") for w in stopwords)
+
+
+def _count_words_python(file_path: str) -> Counter:
+    # Steps 1-5 fused: stream the filing line-by-line and update the Counter
+    # incrementally. A 10-K can run to hundreds of MB; reading it whole held
+    # the raw text plus a lowered plus a regex-cleaned copy, so peak memory
+    # was ~3x the file size. Now it is O(line), counted in the bytes domain
+    # end-to-end; only the final vocabulary (thousands of entries, not
+    # millions of tokens) is decoded and interned for display and lookups.
+    byte_counts: Counter = Counter()
+    with open(file_path, "rb") as f:
+        for line in f:
+            line = line.translate(_LOWER_TABLE, delete=_DELETE_BYTES)
+            byte_counts.update(
+                w for w in line.split() if len(w) > 2 and w not in _STOPWORD_BYTES
+            )
+    return Counter({sys.intern(w.decode("ascii")): c for w, c in byte_counts.items()})
+
+
+if njit is not None:
+
+    @njit(cache=True)
+    def _count_tokens(buf):  # pragma: no cover - compiled
+        # Open-addressing hash table over the raw byte buffer. Tokens are
+        # maximal ASCII-letter runs (anything else delimits), lowercased with
+        # OR 0x20 and hashed with 32-bit FNV-1a. Collisions are resolved by
+        # comparing the token bytes against the slot's first occurrence, so
+        # counts are exact. The table is fixed-size; status 1 signals a
+        # vocabulary too large for it and the caller falls back.
+        cap = 1 << 20
+        mask = cap - 1
+        hashes = np.zeros(cap, dtype=np.int64)
+        starts = np.zeros(cap, dtype=np.int64)
+        lens = np.zeros(cap, dtype=np.int32)
+        counts = np.zeros(cap, dtype=np.int64)
+        limit = (cap * 9) // 10
+        n_unique = 0
+        status = 0
+
+        n = buf.size
+        i = 0
+        while i < n:
+            c = buf[i] | 0x20
+            if c < 97 or c > 122:
+                i += 1
+                continue
+            start = i
+            h = 2166136261
+            while i < n:
+                c = buf[i] | 0x20
+                if c < 97 or c > 122:
+                    break
+                h = ((h ^ c) * 16777619) & 0xFFFFFFFF
+                i += 1
+            length = i - start
+            if length <= 2:
+                continue
+            idx = h & mask
+            while True:
+                if counts[idx] == 0:
+                    if n_unique >= limit:
+                        status = 1
+                        break
+                    hashes[idx] = h
+                    starts[idx] = start
+                    lens[idx] = length
+                    counts[idx] = 1
+                    n_unique += 1
+                    break
+                if hashes[idx] == h and lens[idx] == length:
+                    same = True
+                    for k in range(length):
+                        if (buf[starts[idx] + k] | 0x20) != (buf[start + k] | 0x20):
+                            same = False
+                            break
+                    if same:
+                        counts[idx] += 1
+                        break
+                idx = (idx + 1) & mask
+            if status:
+                break
+
+        out_starts = np.empty(n_unique, dtype=np.int64)
+        out_lens = np.empty(n_unique, dtype=np.int32)
+        out_counts = np.empty(n_unique, dtype=np.int64)
+        j = 0
+        for idx in range(cap):
+            if counts[idx] != 0:
+                out_starts[j] = starts[idx]
+                out_lens[j] = lens[idx]
+                out_counts[j] = counts[idx]
+                j += 1
+        return status, out_starts, out_lens, out_counts
+
+
+def _count_words_numba(file_path: str):
+    """Count words with the compiled kernel; returns None when unavailable.
+
+    The kernel counts every >2-letter token; only the unique vocabulary
+    (thousands of words, not millions of tokens) crosses back into Python,
+    where stopwords are dropped. Tokenization differs slightly from the
+    regex path: punctuation delimits tokens instead of being deleted.
+    """
+    if njit is None:
+        return None
+    with open(file_path, "rb") as f:
+        data = f.read()
+    status, starts, lens, counts = _count_tokens(np.frombuffer(data, dtype=np.uint8))
+    if status != 0:
+        return None
+    word_counts: Counter = Counter()
+    for s, l, c in zip(starts, lens, counts):
+        word = data[s:s + l].decode("ascii").lower()
+        if word not in stopwords:
+            word_counts[word] += int(c)
+    return word_counts
+
+
+def main(file_path: str = FILE_PATH):
+    word_counts = _count_words_numba(file_path)
+    if word_counts is None:
+        word_counts = _count_words_python(file_path)
+    total_words = word_counts.total()
+
+    print(f"Total words (after filtering): {total_words}")
+
+    # Step 6: top 15 by count — a heap selection over the vocabulary,
+    # O(n log 15) instead of the O(n log n) full sort.
+    common_words = heapq.nlargest(15, word_counts.items(), key=operator.itemgetter(1))
+    print("\nTop words:")
+    for word, count in common_words:
+        print(f"  {word}: {count}")
+
+    # Step 7: topic keyword coverage, dispatched through the reverse index
+    topic_totals: Counter = Counter()
+    for word, count in word_counts.items():
+        topic = _KEYWORD_TO_TOPIC.get(word)
+        if topic:
+            topic_totals[topic] += count
+
+    print("\nTopic coverage:")
+    for topic in topic_keywords:
+        topic_total = topic_totals[topic]
+        share = topic_total / total_words if total_words else 0.0
+        print(f"  {topic}: {topic_total} hits ({share:.1%})")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else FILE_PATH)
@@ -0,0 +1,314 @@
+"""
+Translate cleaned SEC filings (HTML or plain text) to English with the
+Google Cloud Translation v3 API.
+
+Usage:
+    python translation-google.py input_filing.html -o translated.txt --project my-gcp-project
+
+Requires:
+    Application Default Credentials (gcloud auth application-default login)
+    pip install requests beautifulsoup4 google-auth
+"""
+
+import argparse
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List
+
+import google.auth
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+# selectolax parses HTML in C (Modest engine) and is 10-30x faster than the
+# pure-Python html.parser on megabyte-sized filings; fall back to
+# BeautifulSoup (lxml if available) when it is not installed.
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None  # type: ignore[assignment, misc]
+from google.auth.transport.requests import Request as GoogleAuthRequest
+
+
+TRANSLATE_URL = (
+    "https://translation.googleapis.com/v3/projects/{project}"
+    "/locations/global:translateText"
+)
+
+# Keep each request comfortably under the v3 per-request size limit.
+MAX_CHUNK_CHARS = 4500
+
+# The v3 endpoint accepts a list of contents per request; greedily pack
+# chunks up to this many bytes per call (soft limit is ~30KB).
+MAX_REQUEST_BYTES = 25_000
+
+# The workload is pure network I/O, so we overlap HTTP round-trips across
+# chunks with a thread pool; executor.map preserves chunk order.
+MAX_WORKERS = 16
+
+MAX_RETRIES = 5
+
+# One pooled session shared across worker threads: connections are kept alive
+# between chunks, so each call skips the TCP+TLS handshake (~50-150 ms).
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+
+
+# Compiled once at import: html_to_text runs per filing and calling .sub on
+# the compiled pattern also skips the re-module cache lookup.
+_WS_RE = re.compile(r"[ \t]{2,}")
+_NL_RE = re.compile(r"\n{3,}")
+
+# HTML sniff for the input head; every pattern in this module is compiled at
+# import so a large dependency tree cannot evict us from the re cache.
+_HTML_SNIFF_RE = re.compile(r"(?i)<\s*(html|body|div|p|br|table)\b")
+
+
+def html_to_text(raw: str) -> str:
+    if HTMLParser is not None:
+        tree = HTMLParser(raw)
+        for node in tree.css("script, style, noscript"):
+            node.decompose()
+        body = tree.body
+        text = body.text(separator="\n") if body is not None else tree.text(separator="\n")
+    else:
+        try:
+            soup = BeautifulSoup(raw, "lxml")
+        except Exception:
+            soup = BeautifulSoup(raw, "html.parser")
+        for tag in soup(["script", "style", "noscript"]):
+            tag.decompose()
+        text = soup.get_text(separator="\n")
+
+    # Collapse noisy whitespace but keep paragraph structure.
+    text = _WS_RE.sub(" ", text)
+    text = _NL_RE.sub("\n\n", text)
+    return text.strip()
+
+
+# lxml's target-parser mode lets us stream HTML without building a tree;
+# used by iter_paragraphs for constant-memory input. Optional dependency.
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+_READ_BLOCK = 1 << 16
+
+_SKIP_TAGS = {"script", "style", "noscript"}
+_BLOCK_TAGS = {"p", "div", "tr", "li", "table", "br", "h1", "h2", "h3", "h4", "h5", "h6"}
+
+
+class _ParagraphTarget:
+    """lxml parser target that closes out a paragraph on block-level tags."""
+
+    def __init__(self):
+        self.ready: List[str] = []
+        self._buf: List[str] = []
+        self._skip = 0
+
+    def start(self, tag, attrib):
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+
+    def end(self, tag):
+        if tag in _SKIP_TAGS:
+            if self._skip:
+                self._skip -= 1
+        elif tag in _BLOCK_TAGS:
+            self.flush()
+
+    def data(self, data):
+        if not self._skip:
+            self._buf.append(data)
+
+    def flush(self):
+        text = _WS_RE.sub(" ", "".join(self._buf)).strip()
+        self._buf.clear()
+        if text:
+            self.ready.append(text)
+
+    def close(self):
+        self.flush()
+
+
+def iter_paragraphs(path: Path) -> Iterator[str]:
+    """Stream paragraphs out of a filing without materializing the whole file.
+
+    HTML is fed to lxml's target parser in 64KB pieces, so peak memory stays
+    O(block) instead of raw + cleaned copies of a 50MB+ filing. Plain text
+    yields on blank lines. Falls back to the in-memory html_to_text path when
+    lxml is not installed.
+    """
+    with path.open("r", encoding="utf-8", errors="replace") as f:
+        head = f.read(_READ_BLOCK)
+        if _HTML_SNIFF_RE.search(head):
+            if etree is None:
+                text = html_to_text(head + f.read())
+                for p in text.split("\n\n"):
+                    p = p.strip()
+                    if p:
+                        yield p
+                return
+            target = _ParagraphTarget()
+            parser = etree.HTMLParser(target=target)
+            piece = head
+            while piece:
+                parser.feed(piece)
+                if target.ready:
+                    yield from target.ready
+                    target.ready.clear()
+                piece = f.read(_READ_BLOCK)
+            parser.close()
+            yield from target.ready
+        else:
+            f.seek(0)
+            buf: List[str] = []
+            for line in f:
+                line = line.strip()
+                if line:
+                    buf.append(line)
+                elif buf:
+                    yield " ".join(buf)
+                    buf = []
+            if buf:
+                yield " ".join(buf)
+
+
+def iter_chunks(paragraphs: Iterable[str], max_chars: int = MAX_CHUNK_CHARS) -> Iterator[str]:
+    """Greedily pack streamed paragraphs into chunks of at most max_chars.
+
+    Generator form of the old chunk_text: consumes paragraphs incrementally
+    (pairs with iter_paragraphs) and never holds more than one chunk.
+    """
+    buf: List[str] = []
+    buf_len = 0
+
+    for p in paragraphs:
+        plen = len(p)
+        if not plen:
+            continue
+
+        # Hard-split paragraphs that are larger than a whole chunk.
+        if plen > max_chars:
+            if buf:
+                yield "\n\n".join(buf)
+                buf = []
+                buf_len = 0
+            yield from (p[i:i + max_chars] for i in range(0, plen, max_chars))
+            continue
+
+        if buf and buf_len + plen + 2 > max_chars:
+            yield "\n\n".join(buf)
+            buf = []
+            buf_len = 0
+        buf.append(p)
+        buf_len += plen + 2
+
+    if buf:
+        yield "\n\n".join(buf)
+
+
+# ADC tokens last ~an hour: resolve the credentials once and only refresh
+# when expired, instead of re-running google.auth.default() for every chunk.
+_CREDS = None
+_CREDS_LOCK = threading.Lock()
+
+
+def get_adc_access_token() -> str:
+    global _CREDS
+    with _CREDS_LOCK:
+        if _CREDS is None:
+            _CREDS, _ = google.auth.default(scopes=["https://www.googleapis.com/auth/cloud-translation"])
+        if not _CREDS.valid:
+            _CREDS.refresh(GoogleAuthRequest())
+        return _CREDS.token
+
+
+def batch_chunks(chunks: Iterable[str], max_bytes: int = MAX_REQUEST_BYTES) -> List[List[str]]:
+    """Greedily pack chunks into request-sized batches, preserving order."""
+    batches: List[List[str]] = []
+    buf: List[str] = []
+    buf_bytes = 0
+    for ch in chunks:
+        size = len(ch.encode("utf-8"))
+        if buf and buf_bytes + size > max_bytes:
+            batches.append(buf)
+            buf = []
+            buf_bytes = 0
+        buf.append(ch)
+        buf_bytes += size
+    if buf:
+        batches.append(buf)
+    return batches
+
+
+def google_translate_batch_v3(texts: List[str], project: str, target_lang: str) -> List[str]:
+    """Translate a batch of chunks in one v3 call via the contents array."""
+    url = TRANSLATE_URL.format(project=project)
+    payload = {
+        "contents": texts,
+        "mimeType": "text/plain",
+        "targetLanguageCode": target_lang,
+    }
+
+    for attempt in range(1, MAX_RETRIES + 1):
+        token = get_adc_access_token()
+        resp = SESSION.post(
+            url,
+            json=payload,
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=120,
+        )
+        if resp.status_code == 429 or resp.status_code >= 500:
+            if attempt == MAX_RETRIES:
+                resp.raise_for_status()
+            time.sleep(2 ** attempt)
+            continue
+        resp.raise_for_status()
+        # The response preserves input order.
+        return [t["translatedText"] for t in resp.json()["translations"]]
+
+    raise RuntimeError("unreachable")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Translate a filing to English via Google Translate v3.")
+    ap.add_argument("input", type=Path, help="Input filing (.html or .txt)")
+    ap.add_argument("-o", "--output", type=Path, default=None, help="Output .txt path")
+    ap.add_argument("--project", default=os.environ.get("GOOGLE_CLOUD_PROJECT"),
+                    help="GCP project id (defaults to GOOGLE_CLOUD_PROJECT)")
+    ap.add_argument("--target-lang", default="en", help="Target language code")
+    ap.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = ap.parse_args()
+
+    if not args.project:
+        sys.exit("Missing GCP project id (--project or GOOGLE_CLOUD_PROJECT).")
+
+    batches = batch_chunks(iter_chunks(iter_paragraphs(args.input)))
+    if not batches:
+        sys.exit(f"No translatable text found in {args.input}")
+
+    chunks = [ch for batch in batches for ch in batch]
+    print(f"{len(chunks)} chunks in {len(batches)} request(s), {args.workers} workers")
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        results = list(executor.map(
+            lambda batch: google_translate_batch_v3(batch, args.project, args.target_lang),
+            batches,
+        ))
+
+    out_parts = [t for batch in results for t in batch]
+
+    out_path = args.output or args.input.with_suffix(".translated.txt")
+    out_path.write_text("\n\n".join(out_parts), encoding="utf-8")
+    print(f"Done. Translated text written to: {out_path}")
+
+
+if __name__ == "__main__":
+    main()